@@ -5,7 +5,6 @@ Allows testing the functionality without MCP protocol.
 """
 
 import argparse
-import json
 import sys
 import os
 from pathlib import Path
@@ -16,7 +15,7 @@ src_dir = os.path.join(current_dir, 'src')
 sys.path.insert(0, src_dir)
 
 try:
-    from mcp_server import ProjectPackager
+    from mcp_server import ProjectPackager, loads_json, open_zstd_writer
 except ImportError as e:
     print(f"Error importing ProjectPackager: {e}")
     print(f"Current directory: {current_dir}")
@@ -29,23 +28,52 @@ def export_command(args):
     """Handle export command."""
     packager = ProjectPackager()
     
+    if args.format == 'msgpack' and not args.output:
+        print("Error: the msgpack format requires --output", file=sys.stderr)
+        return 1
+    
+    compress = args.compress or bool(args.output and args.output.endswith('.zst'))
+    if compress and not args.output:
+        print("Error: --compress requires --output", file=sys.stderr)
+        return 1
+    
     try:
-        result = packager.export_project(args.project_path, args.include_hidden, args.use_default_ignores)
-        
+        # The export is streamed to its destination instead of being built in memory first
         if args.output:
-            with open(args.output, 'w') as f:
-                json.dump(result, f, indent=2)
+            # Write to a temporary file next to the output and move it into place only once
+            # the export succeeds, so a failed export never truncates an existing file
+            temp_output = f"{args.output}.{os.getpid()}.tmp"
+            try:
+                with open(temp_output, 'xb') as f:
+                    if compress:
+                        with open_zstd_writer(f) as compressed:
+                            result = packager.write_export(compressed, args.project_path, args.include_hidden,
+                                                           args.use_default_ignores, args.format,
+                                                           args.max_file_bytes, args.include_structure)
+                    else:
+                        result = packager.write_export(f, args.project_path, args.include_hidden,
+                                                       args.use_default_ignores, args.format, args.max_file_bytes,
+                                                       args.include_structure)
+                os.replace(temp_output, args.output)
+            finally:
+                if os.path.exists(temp_output):
+                    os.remove(temp_output)
             print(f"Project exported to: {args.output}")
         else:
-            print(json.dumps(result, indent=2))
+            sys.stdout.flush()
+            result = packager.write_export(sys.stdout.buffer, args.project_path, args.include_hidden,
+                                           args.use_default_ignores, args.format, args.max_file_bytes,
+                                           args.include_structure)
+            sys.stdout.buffer.flush()
             
         metadata = result['metadata']
         print(f"\nSummary:")
         print(f"- Project: {metadata['project_name']}")
-        print(f"- Files: {len(result['files'])}")
+        print(f"- Files: {len(result['file_index'])}")
         print(f"- Has .gitignore: {metadata['has_gitignore']}")
         print(f"- Using default ignores: {metadata['use_default_ignores']}")
         print(f"- Including hidden files: {metadata['include_hidden']}")
+        print(f"- Skipped large files: {metadata['skipped_large_files']}")
         print(f"- Timestamp: {metadata['export_timestamp']}")
         
     except Exception as e:
@@ -60,14 +88,12 @@ def import_command(args):
     packager = ProjectPackager()
     
     try:
-        # Read JSON data
+        # Exported files are streamed where possible; inline data is parsed directly
         if args.json_file:
-            with open(args.json_file, 'r') as f:
-                json_data = json.load(f)
+            result = packager.import_project_file(args.json_file, args.target_path, args.overwrite)
         else:
-            json_data = json.loads(args.json_data)
-        
-        result = packager.import_project(json_data, args.target_path, args.overwrite)
+            json_data = loads_json(args.json_data)
+            result = packager.import_project(json_data, args.target_path, args.overwrite)
         
         print(f"Import completed successfully!")
         print(f"- Target: {args.target_path}")
@@ -96,6 +122,14 @@ def main():
     export_parser = subparsers.add_parser('export', help='Export project to JSON')
     export_parser.add_argument('project_path', help='Path to project directory')
     export_parser.add_argument('-o', '--output', help='Output JSON file path')
+    export_parser.add_argument('--format', choices=['json', 'msgpack'], default='json',
+                             help='Output format; msgpack stores binary files without base64 (default: json)')
+    export_parser.add_argument('--include-structure', action='store_true',
+                             help='Include a nested directory tree alongside the flat file index')
+    export_parser.add_argument('--compress', action='store_true',
+                             help='Compress the output with zstandard (implied by a .zst output path)')
+    export_parser.add_argument('--max-file-bytes', type=int, default=ProjectPackager.DEFAULT_MAX_FILE_BYTES,
+                             help='Export files larger than this as size and SHA-256 only; 0 disables the limit (default: 5 MiB)')
     export_parser.add_argument('--include-hidden', action='store_true',
                              help='Include hidden files and directories')
     export_parser.add_argument('--no-default-ignores', action='store_true',
@@ -110,7 +144,7 @@ def main():
     
     # JSON input options (mutually exclusive)
     json_group = import_parser.add_mutually_exclusive_group(required=True)
-    json_group.add_argument('-f', '--json-file', help='JSON file to import from')
+    json_group.add_argument('-f', '--json-file', help='JSON or MessagePack file to import from, optionally zstandard compressed')
     json_group.add_argument('-d', '--json-data', help='JSON data string')
     
     import_parser.add_argument('--overwrite', action='store_true',
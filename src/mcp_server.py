@@ -10,89 +10,342 @@ This server provides two main services:
 import json
 import os
 import base64
+import binascii
+import codecs
+import functools
+import hashlib
 import asyncio
+import shutil
+import stat
+import time
+import argparse
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import pathspec
 import mcp.types as types
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
-import argparse
-import sys
 
 try:
     from gitignore_parser import parse_gitignore
 except ImportError:
     # Fallback implementation if gitignore_parser is not available
     def parse_gitignore(gitignore_path):
-        """Fallback gitignore parser"""
+        """Fallback gitignore parser using pathspec's gitignore semantics"""
         try:
             with open(gitignore_path, 'r', encoding='utf-8') as f:
-                patterns = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-            
-            def matches(file_path):
-                for pattern in patterns:
-                    if pattern in file_path or file_path.endswith(pattern):
-                        return True
-                return False
-            return matches
+                spec = pathspec.GitIgnoreSpec.from_lines(f)
         except FileNotFoundError:
             return lambda x: False
+        
+        # Patterns are relative to the directory containing the .gitignore
+        base_dir = os.path.dirname(os.path.abspath(gitignore_path))
+        
+        def matches(file_path):
+            relative_path = os.path.relpath(file_path, base_dir)
+            # Paths outside the base directory, but not in-tree names such as "..cache"
+            if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+                return False
+            if spec.match_file(relative_path):
+                return True
+            # Directory-only patterns such as "build/" need the trailing slash to match
+            return spec.match_file(relative_path + '/') and os.path.isdir(file_path)
+        return matches
+
+
+# Optional dependencies; each one only enables a faster or additional code path
+try:
+    import orjson
+except ImportError:
+    # Fall back to the standard library json module
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    # Exported files are loaded in full instead of streamed
+    ijson = None
+
+try:
+    import msgpack
+except ImportError:
+    # The msgpack export format is unavailable without it
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    # Compressed exports are unavailable without it
+    zstandard = None
+
+# Frame header that starts every zstandard stream
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+@functools.lru_cache(maxsize=64)
+def _load_gitignore(gitignore_path: str, mtime_ns: int, size: int):
+    """Parse a .gitignore once per version of the file; mtime and size only key the cache."""
+    return parse_gitignore(gitignore_path)
+
+
+def dumps_json(data: Any, indent: bool = False) -> bytes:
+    """Serialize data to UTF-8 encoded JSON, using orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            # orjson rejects surrogate-escaped strings, such as non-UTF-8 file names
+            # from os.scandir, which the json module escapes
+            pass
+    return json.dumps(data, indent=2 if indent else None).encode('utf-8')
+
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_msgpack(data: Any) -> bytes:
+    """Serialize data to MessagePack, keeping bytes values as native binary."""
+    if msgpack is None:
+        raise ImportError("The msgpack package is required for the msgpack format")
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def loads_msgpack(data: bytes) -> Any:
+    """Parse MessagePack data produced by dumps_msgpack."""
+    if msgpack is None:
+        raise ImportError("The msgpack package is required for the msgpack format")
+    return msgpack.unpackb(data, raw=False)
+
+
+def open_zstd_writer(f: BinaryIO) -> BinaryIO:
+    """Wrap a binary file so everything written to it is zstandard compressed."""
+    if zstandard is None:
+        raise ImportError("The zstandard package is required for compressed exports")
+    return zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(f)
+
+
+def open_zstd_reader(f: BinaryIO) -> BinaryIO:
+    """Wrap a zstandard compressed binary file so reads return decompressed data."""
+    if zstandard is None:
+        raise ImportError("The zstandard package is required for compressed exports")
+    return zstandard.ZstdDecompressor().stream_reader(f)
 
 
 class ProjectPackager:
     """Handles project packaging and extraction operations."""
     
+    # Files larger than this are read and encoded in chunks
+    STREAMING_THRESHOLD = 1024 * 1024
+    # Multiple of 57 (and therefore of 3) bytes, so base64 chunks need no padding
+    BASE64_CHUNK_SIZE = 57 * 1024
+    # Base64 characters decoded per chunk when importing large files; a multiple of 4
+    BASE64_DECODE_CHUNK_SIZE = 64 * 1024
+    # Hidden names that are exported even when hidden files are excluded
+    _HIDDEN_ALLOW = frozenset({'.gitignore', '.gitkeep'})
+    # Serialization formats supported by export_project
+    EXPORT_FORMATS = ('json', 'msgpack')
+    # Files larger than this are exported as a size and hash only
+    DEFAULT_MAX_FILE_BYTES = 5 * 1024 * 1024
+    
     def __init__(self):
         self.default_ignore_patterns = [
             '.git/', '__pycache__/', '*.pyc', '.pytest_cache/',
             'node_modules/', '.vscode/', '.idea/', '*.log',
-            '.env', '.DS_Store', 'Thumbs.db', '*.tmp'
+            '.env', '.env.*', '.DS_Store', 'Thumbs.db', '*.tmp'
         ]
-    
-    def _should_ignore(self, path: Path, gitignore_matcher=None, use_default_ignores: bool = True) -> bool:
-        """Check if a path should be ignored based on gitignore and default patterns."""
-        path_str = str(path)
+        # Number of threads used to read file contents during export
+        self.max_read_workers = min(32, (os.cpu_count() or 1) * 4)
         
-        # Check gitignore first
-        if gitignore_matcher and gitignore_matcher(path_str):
-            return True
+        # Split the defaults into sets checked against a path's name in O(1):
+        # directory names ('dir/') and single extensions ('*.ext')
+        self.default_ignore_dirs = set()
+        self.default_ignore_suffixes = set()
+        remaining_patterns = []
+        for pattern in self.default_ignore_patterns:
+            if pattern.endswith('/') and self._is_literal_name(pattern[:-1]):
+                self.default_ignore_dirs.add(pattern[:-1])
+            elif pattern.startswith('*.') and self._is_literal_name(pattern[2:]) and '.' not in pattern[2:]:
+                self.default_ignore_suffixes.add(pattern[1:])
+            else:
+                remaining_patterns.append(pattern)
         
-        # Check default patterns only if enabled
+        # Compile the literal names and any other patterns once instead of re-scanning
+        # them for every path
+        self._ignore_spec = pathspec.GitIgnoreSpec.from_lines(remaining_patterns) if remaining_patterns else None
+    
+    @staticmethod
+    def _is_literal_name(pattern: str) -> bool:
+        """Check if a pattern is a plain file or directory name without wildcards."""
+        return bool(pattern) and not any(char in pattern for char in '*?[]!\\/#')
+    
+    def _should_ignore(self, path: Path, gitignore_matcher=None, use_default_ignores: bool = True,
+                       check_ancestors: bool = True) -> bool:
+        """
+        Check if a path should be ignored based on gitignore and default patterns.
+        
+        The export walk prunes ignored directories before descending into them, so it
+        passes check_ancestors=False to skip re-testing every parent directory name.
+        """
+        # Check default patterns only if enabled, cheapest lookups first
         if use_default_ignores:
-            for pattern in self.default_ignore_patterns:
-                if pattern.endswith('/'):
-                    if pattern[:-1] in path.parts:
-                        return True
-                elif pattern.startswith('*'):
-                    if path_str.endswith(pattern[1:]):
-                        return True
-                elif pattern in path_str:
-                    return True
+            name = path.name
+            if name in self.default_ignore_dirs:
+                return True
+            
+            # A name such as '.tmp' ends with the extension but has no suffix of its own
+            if path.suffix in self.default_ignore_suffixes or name in self.default_ignore_suffixes:
+                return True
+            
+            if check_ancestors and not self.default_ignore_dirs.isdisjoint(path.parts):
+                return True
+            
+            if self._ignore_spec is not None and self._ignore_spec.match_file(str(path)):
+                return True
+        
+        # Check gitignore
+        if gitignore_matcher and gitignore_matcher(str(path)):
+            return True
         
         return False
     
-    def _read_file_content(self, file_path: Path) -> Dict[str, Any]:
-        """Read file content and return as base64 if binary, text if readable."""
+    def _read_file_content(self, file_path: Path, size: Optional[int] = None, encode_binary: bool = True) -> Dict[str, Any]:
+        """
+        Read file content and return as text if readable, otherwise as binary.
+        
+        Binary content is base64 encoded unless encode_binary is False, in which case
+        the raw bytes are returned for binary serialization formats. The SHA-256 of the
+        raw content is included so duplicate files can be stored once.
+        """
+        with open(file_path, 'rb') as f:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size
+            if size > self.STREAMING_THRESHOLD:
+                return self._read_large_file_content(f, encode_binary)
+            content = f.read()
+        
+        sha256 = hashlib.sha256(content).hexdigest()
+        
+        # Decode the bytes already in memory instead of re-reading the file as text
         try:
-            # Try to read as text first
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                return {
-                    'type': 'text',
-                    'content': content,
-                    'encoding': 'utf-8'
-                }
-        except (UnicodeDecodeError, UnicodeError):
-            # If text reading fails, read as binary
-            with open(file_path, 'rb') as f:
-                content = f.read()
+            return {
+                'type': 'text',
+                'content': content.decode('utf-8'),
+                'encoding': 'utf-8',
+                'sha256': sha256
+            }
+        except UnicodeDecodeError:
+            if not encode_binary:
                 return {
                     'type': 'binary',
-                    'content': base64.b64encode(content).decode('ascii'),
-                    'encoding': 'base64'
+                    'content': content,
+                    'encoding': 'raw',
+                    'sha256': sha256
                 }
+            return {
+                'type': 'binary',
+                'content': base64.b64encode(content).decode('ascii'),
+                'encoding': 'base64',
+                'sha256': sha256
+            }
+    
+    def _read_large_file_content(self, f, encode_binary: bool = True) -> Dict[str, Any]:
+        """Read a large file from an open binary handle chunk by chunk to bound peak memory."""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        digest = hashlib.sha256()
+        text_parts = []
+        try:
+            for chunk in iter(lambda: f.read(self.BASE64_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                text_parts.append(decoder.decode(chunk))
+            text_parts.append(decoder.decode(b'', final=True))
+            return {
+                'type': 'text',
+                'content': ''.join(text_parts),
+                'encoding': 'utf-8',
+                'sha256': digest.hexdigest()
+            }
+        except UnicodeDecodeError:
+            del text_parts
+        
+        f.seek(0)
+        if not encode_binary:
+            content = f.read()
+            return {
+                'type': 'binary',
+                'content': content,
+                'encoding': 'raw',
+                'sha256': hashlib.sha256(content).hexdigest()
+            }
+        
+        # Chunks are a multiple of 3 bytes, so their encodings concatenate without padding
+        digest = hashlib.sha256()
+        encoded = bytearray()
+        for chunk in iter(lambda: f.read(self.BASE64_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            encoded += base64.b64encode(chunk)
+        return {
+            'type': 'binary',
+            'content': encoded.decode('ascii'),
+            'encoding': 'base64',
+            'sha256': digest.hexdigest()
+        }
     
-    def export_project(self, project_path: str, include_hidden: bool = False, use_default_ignores: bool = True) -> Dict[str, Any]:
+    @staticmethod
+    def _file_sha256(file_path: Path) -> str:
+        """Hash a file's content in chunks without loading it into memory."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _scan_tree(root: Path) -> Iterator[Tuple[str, str, List[os.DirEntry], List[os.DirEntry]]]:
+        """
+        Walk a directory tree top-down, like os.walk, but yield os.DirEntry objects.
+        
+        Entries cache their type from the directory listing, so no extra stat calls are
+        needed to tell directories from everything else. Callers prune the walk by removing
+        entries from the yielded directory list. Symlinked directories are not followed.
+        
+        Yields:
+            Tuples of (directory path, path relative to root, directory entries, other entries).
+            Other entries are not guaranteed to be regular files; callers check their stat.
+        """
+        pending = [(str(root), "")]
+        
+        while pending:
+            current_path, relative_path = pending.pop()
+            dir_entries = []
+            file_entries = []
+            
+            try:
+                with os.scandir(current_path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            dir_entries.append(entry)
+                        else:
+                            file_entries.append(entry)
+            except OSError as e:
+                print(f"Error accessing {current_path}: {e}")
+                continue
+            
+            yield current_path, relative_path, dir_entries, file_entries
+            
+            for entry in reversed(dir_entries):
+                entry_relative = os.path.join(relative_path, entry.name) if relative_path else entry.name
+                pending.append((entry.path, entry_relative))
+    
+    def export_project(self, project_path: str, include_hidden: bool = False, use_default_ignores: bool = True,
+                       export_format: str = 'json', max_file_bytes: Optional[int] = DEFAULT_MAX_FILE_BYTES,
+                       include_structure: bool = False) -> Dict[str, Any]:
         """
         Export project structure to JSON format.
         
@@ -100,10 +353,99 @@ class ProjectPackager:
             project_path: Path to the project directory
             include_hidden: Whether to include hidden files/directories
             use_default_ignores: Whether to apply default ignore patterns when no .gitignore exists
+            export_format: 'json' to base64 encode binary files, or 'msgpack' to keep them as raw
+                bytes for serialization with dumps_msgpack
+            max_file_bytes: Files larger than this are recorded with their size and SHA-256
+                instead of their content; None or 0 exports every file in full
+            include_structure: Whether to add a nested 'structure' tree of directories and
+                files; 'file_index' already lists every file by path
+            
+        Returns:
+            Dictionary containing the complete project structure. File metadata is kept
+            in 'file_index' and file contents in 'file_contents', both keyed by relative
+            path, so consumers that only need the manifest can skip the contents.
+        """
+        project_data, file_contents = self.stream_export(
+            project_path, include_hidden, use_default_ignores, export_format, max_file_bytes, include_structure
+        )
+        project_data['file_contents'] = dict(file_contents)
+        return project_data
+    
+    def write_export(self, output: BinaryIO, project_path: str, include_hidden: bool = False,
+                     use_default_ignores: bool = True, export_format: str = 'json',
+                     max_file_bytes: Optional[int] = DEFAULT_MAX_FILE_BYTES,
+                     include_structure: bool = False) -> Dict[str, Any]:
+        """
+        Export a project and write it to a binary stream.
+        
+        JSON exports are written incrementally, one content record at a time, so only the
+        file index and the records currently being read are held in memory. MessagePack
+        exports are built in full before being written.
+        
+        Args:
+            output: Binary file object to write the serialized export to
+            project_path, include_hidden, use_default_ignores, export_format, max_file_bytes,
+            include_structure: As for export_project
+            
+        Returns:
+            The exported project data without 'file_contents'
+        """
+        if export_format == 'msgpack':
+            project_data = self.export_project(project_path, include_hidden, use_default_ignores,
+                                               export_format, max_file_bytes, include_structure)
+            output.write(dumps_msgpack(project_data))
+            del project_data['file_contents']
+            return project_data
+        
+        project_data, file_contents = self.stream_export(
+            project_path, include_hidden, use_default_ignores, export_format, max_file_bytes, include_structure
+        )
+        
+        output.write(b'{')
+        for key, value in project_data.items():
+            output.write(dumps_json(key) + b': ' + dumps_json(value) + b',\n')
+        
+        output.write(b'"file_contents": {')
+        separator = b'\n'
+        for relative_path, content_info in file_contents:
+            output.write(separator + dumps_json(relative_path) + b': ' + dumps_json(content_info))
+            separator = b',\n'
+        output.write(b'\n}}\n')
+        
+        return project_data
+    
+    def stream_export(self, project_path: str, include_hidden: bool = False, use_default_ignores: bool = True,
+                      export_format: str = 'json', max_file_bytes: Optional[int] = DEFAULT_MAX_FILE_BYTES,
+                      include_structure: bool = False
+                      ) -> Tuple[Dict[str, Any], Iterator[Tuple[str, Dict[str, Any]]]]:
+        """
+        Walk a project and return its export without reading file contents up front.
+        
+        Args:
+            project_path: Path to the project directory
+            include_hidden: Whether to include hidden files/directories
+            use_default_ignores: Whether to apply default ignore patterns when no .gitignore exists
+            export_format: 'json' to base64 encode binary files, or 'msgpack' to keep them as raw
+                bytes for serialization with dumps_msgpack
+            max_file_bytes: Files larger than this are recorded with their size and SHA-256
+                instead of their content; None or 0 exports every file in full
+            include_structure: Whether to add a nested 'structure' tree of directories and
+                files; 'file_index' already lists every file by path
             
         Returns:
-            Dictionary containing the complete project structure
+            Tuple of the project data without 'file_contents', and a generator yielding
+            (relative path, content record) pairs in walk order. Contents are read in
+            parallel as the generator is consumed.
         """
+        if export_format not in self.EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        if max_file_bytes is not None and max_file_bytes < 0:
+            raise ValueError(f"max_file_bytes must not be negative: {max_file_bytes}")
+        if max_file_bytes == 0:
+            # 0 is how the CLI and the MCP tool ask for no limit
+            max_file_bytes = None
+        encode_binary = export_format == 'json'
+        
         project_path = Path(project_path).resolve()
         
         if not project_path.exists():
@@ -118,98 +460,246 @@ class ProjectPackager:
         has_gitignore = gitignore_path.exists()
         
         if has_gitignore:
-            gitignore_matcher = parse_gitignore(str(gitignore_path))
+            # Repeated exports of an unchanged project reuse the parsed matcher
+            gitignore_stat = gitignore_path.stat()
+            gitignore_matcher = _load_gitignore(str(gitignore_path), gitignore_stat.st_mtime_ns,
+                                                gitignore_stat.st_size)
         
         project_data = {
             'metadata': {
-                'export_timestamp': asyncio.get_event_loop().time(),
+                'export_timestamp': time.time(),
                 'project_name': project_path.name,
                 'project_path': str(project_path),
                 'include_hidden': include_hidden,
                 'use_default_ignores': use_default_ignores,
-                'has_gitignore': has_gitignore
-            },
-            'structure': {},
-            'files': {}
+                'has_gitignore': has_gitignore,
+                'format': export_format,
+                'max_file_bytes': max_file_bytes,
+                'include_structure': include_structure,
+                'skipped_large_files': 0
+            }
         }
         
-        def scan_directory(current_path: Path, relative_path: str = ""):
-            """Recursively scan directory structure."""
-            items = []
+        # Directory listings of the tree, keyed by path relative to the project root;
+        # only kept when the nested structure is requested
+        structure_index = {'': []} if include_structure else None
+        if include_structure:
+            project_data['structure'] = structure_index['']
+        project_data['file_index'] = {}
+        # Files whose content still has to be read, in walk order
+        pending_reads = []
+        skipped_large_files = 0
+        
+        # Bind lookups used for every entry to locals ahead of the loop
+        should_ignore = self._should_ignore
+        path_join = os.path.join
+        is_regular_file = stat.S_ISREG
+        file_index = project_data['file_index']
+        queue_read = pending_reads.append
+        
+        for current_path, relative_path, dir_entries, file_entries in self._scan_tree(project_path):
+            items = structure_index[relative_path] if include_structure else None
+            
+            # Prune ignored directories in place so the walk never descends into them
+            kept_dir_entries = []
+            for entry in dir_entries:
+                name = entry.name
+                # Skip hidden directories unless requested
+                if not include_hidden and name[0] == '.' and name not in self._HIDDEN_ALLOW:
+                    continue
+                
+                if should_ignore(Path(entry.path), gitignore_matcher, use_default_ignores, check_ancestors=False):
+                    continue
+                
+                if include_structure:
+                    item_relative = path_join(relative_path, name) if relative_path else name
+                    dir_info = {
+                        'name': name,
+                        'path': item_relative,
+                        'type': 'directory',
+                        'children': []
+                    }
+                    structure_index[item_relative] = dir_info['children']
+                    items.append(dir_info)
+                kept_dir_entries.append(entry)
+            dir_entries[:] = kept_dir_entries
             
+            for entry in file_entries:
+                name = entry.name
+                # Skip hidden files unless requested
+                if not include_hidden and name[0] == '.' and name not in self._HIDDEN_ALLOW:
+                    continue
+                
+                item = Path(entry.path)
+                if should_ignore(item, gitignore_matcher, use_default_ignores, check_ancestors=False):
+                    continue
+                
+                # A single stat call both identifies regular files and provides their metadata
+                try:
+                    stat_result = entry.stat()
+                except OSError:
+                    # Broken symlinks and entries removed during the walk
+                    continue
+                if not is_regular_file(stat_result.st_mode):
+                    continue
+                
+                item_relative = path_join(relative_path, name) if relative_path else name
+                
+                # Store file information
+                file_info = {
+                    'name': name,
+                    'path': item_relative,
+                    'size': stat_result.st_size,
+                    'modified': stat_result.st_mtime,
+                    'type': 'file'
+                }
+                
+                # Contents are read once the walk is complete
+                file_index[item_relative] = file_info
+                queue_read((item_relative, item, stat_result.st_size))
+                if max_file_bytes is not None and stat_result.st_size > max_file_bytes:
+                    skipped_large_files += 1
+                if include_structure:
+                    items.append(file_info)
+        
+        # Known before any content is read, so streamed exports can report it up front
+        project_data['metadata']['skipped_large_files'] = skipped_large_files
+        
+        def read_file(item: Path, size: int) -> Dict[str, Any]:
+            """Read one file's content record."""
             try:
-                for item in current_path.iterdir():
-                    # Skip hidden files unless requested
-                    if not include_hidden and item.name.startswith('.') and item.name not in ['.gitignore', '.gitkeep']:
-                        continue
-                    
-                    item_relative = os.path.join(relative_path, item.name) if relative_path else item.name
-                    
-                    # Check if should be ignored
-                    if self._should_ignore(item, gitignore_matcher, use_default_ignores):
-                        continue
-                    
-                    if item.is_file():
-                        # Store file information
-                        file_info = {
-                            'name': item.name,
-                            'path': item_relative,
-                            'size': item.stat().st_size,
-                            'modified': item.stat().st_mtime,
-                            'type': 'file'
-                        }
-                        
-                        # Read file content
-                        try:
-                            content_data = self._read_file_content(item)
-                            file_info.update(content_data)
-                            project_data['files'][item_relative] = file_info
-                        except Exception as e:
-                            file_info['error'] = str(e)
-                            file_info['type'] = 'error'
-                            project_data['files'][item_relative] = file_info
-                        
-                        items.append(file_info)
-                        
-                    elif item.is_dir():
-                        # Recursively scan subdirectory
-                        dir_info = {
-                            'name': item.name,
-                            'path': item_relative,
-                            'type': 'directory',
-                            'children': scan_directory(item, item_relative)
-                        }
-                        items.append(dir_info)
+                if max_file_bytes is not None and size > max_file_bytes:
+                    return {
+                        'type': 'skipped-large',
+                        'sha256': self._file_sha256(item)
+                    }
+                
+                return self._read_file_content(item, size, encode_binary)
+            except Exception as e:
+                return {
+                    'type': 'error',
+                    'error': str(e)
+                }
+        
+        def read_contents() -> Iterator[Tuple[str, Dict[str, Any]]]:
+            """Yield content records in walk order while keeping a bounded number of reads in flight."""
+            max_in_flight = self.max_read_workers * 2
+            in_flight = deque()
+            # Content hashes already emitted, so later copies are stored as references
+            seen_content = set()
             
-            except PermissionError as e:
-                print(f"Permission denied accessing {current_path}: {e}")
+            def deduplicate(content_info: Dict[str, Any]) -> Dict[str, Any]:
+                if content_info['type'] not in ('text', 'binary'):
+                    return content_info
+                sha256 = content_info['sha256']
+                if sha256 in seen_content:
+                    return {
+                        'type': 'duplicate',
+                        'content_ref': sha256
+                    }
+                seen_content.add(sha256)
+                return content_info
             
-            return items
-        
-        project_data['structure'] = scan_directory(project_path)
+            # File reads are I/O bound and release the GIL, so they scale across threads
+            with ThreadPoolExecutor(max_workers=self.max_read_workers) as executor:
+                for item_relative, item, size in pending_reads:
+                    in_flight.append((item_relative, executor.submit(read_file, item, size)))
+                    if len(in_flight) >= max_in_flight:
+                        item_relative, future = in_flight.popleft()
+                        yield item_relative, deduplicate(future.result())
+                
+                while in_flight:
+                    item_relative, future = in_flight.popleft()
+                    yield item_relative, deduplicate(future.result())
         
-        return project_data
+        return project_data, read_contents()
     
-    def import_project(self, json_data: Union[str, Dict], target_path: str, overwrite: bool = False) -> Dict[str, Any]:
+    def import_project(self, json_data: Union[str, bytes, Dict], target_path: str, overwrite: bool = False) -> Dict[str, Any]:
         """
         Import/extract project structure from JSON.
         
         Args:
-            json_data: JSON string or dictionary containing project data
+            json_data: JSON string, serialized JSON or MessagePack bytes, or dictionary
+                containing project data
             target_path: Path where to extract the project
             overwrite: Whether to overwrite existing files
             
         Returns:
             Dictionary with import results
         """
-        if isinstance(json_data, str):
+        if isinstance(json_data, bytes) and json_data.lstrip()[:1] != b'{':
+            # A JSON export always starts with an object, anything else is MessagePack
+            try:
+                data = loads_msgpack(json_data)
+            except ValueError as e:
+                raise ValueError(f"Invalid MessagePack data: {e}")
+        elif isinstance(json_data, (str, bytes)):
             try:
-                data = json.loads(json_data)
+                data = loads_json(json_data)
             except json.JSONDecodeError as e:
                 raise ValueError(f"Invalid JSON data: {e}")
         else:
             data = json_data
         
+        file_index = data.get('file_index')
+        if file_index is None:
+            # Older exports keep metadata and content together under 'files'
+            file_index = data.get('files', {})
+            file_contents = file_index
+        else:
+            file_contents = data.get('file_contents', {})
+        
+        return self._extract_files(file_index, file_contents.items(), target_path, overwrite)
+    
+    def import_project_file(self, file_path: str, target_path: str, overwrite: bool = False) -> Dict[str, Any]:
+        """
+        Import/extract project structure from an exported file.
+        
+        When ijson is available, JSON exports are streamed: the small file index is read
+        first, then content records are decoded and written one at a time instead of
+        loading the whole export into memory. Zstandard compressed exports are detected
+        from their magic bytes and decompressed on the fly.
+        
+        Args:
+            file_path: Path to a JSON or MessagePack export, optionally zstandard compressed
+            target_path: Path where to extract the project
+            overwrite: Whether to overwrite existing files
+            
+        Returns:
+            Dictionary with import results
+        """
+        def open_export() -> BinaryIO:
+            """Open the export from the start, decompressing it if needed."""
+            f = open(file_path, 'rb')
+            is_compressed = f.read(len(ZSTD_MAGIC)) == ZSTD_MAGIC
+            f.seek(0)
+            return open_zstd_reader(f) if is_compressed else f
+        
+        # Compressed streams cannot seek back, so each pass reopens the export
+        with open_export() as f:
+            is_json = f.read(64).lstrip()[:1] == b'{'
+        
+        if ijson is None or not is_json:
+            with open_export() as f:
+                return self.import_project(f.read(), target_path, overwrite)
+        
+        try:
+            with open_export() as f:
+                file_index = next(ijson.items(f, 'file_index', use_float=True), None)
+            
+            with open_export() as f:
+                if file_index is None:
+                    # Older exports have no index to stream against
+                    return self.import_project(f.read(), target_path, overwrite)
+                
+                file_contents = ijson.kvitems(f, 'file_contents', use_float=True)
+                return self._extract_files(file_index, file_contents, target_path, overwrite)
+        except ijson.JSONError as e:
+            raise ValueError(f"Invalid JSON data: {e}")
+    
+    def _extract_files(self, file_index: Dict[str, Any], file_contents: Iterable[Tuple[str, Dict[str, Any]]],
+                       target_path: str, overwrite: bool) -> Dict[str, Any]:
+        """Write content records to disk under target_path, using the index to lay out directories."""
         target_path = Path(target_path).resolve()
         
         # Create target directory if it doesn't exist
@@ -222,41 +712,107 @@ class ProjectPackager:
             'errors': []
         }
         
+        # Create each distinct parent directory once, up front from the index;
+        # shorter paths first so parents exist before their children
+        target_dir = str(target_path)
+        directories = {os.path.dirname(os.path.join(target_dir, file_path)) for file_path in file_index}
+        for directory in sorted(directories, key=len):
+            os.makedirs(directory, exist_ok=True)
+        
+        # Where each content hash can be found again: the file written for it, or its
+        # record when that file was skipped. Duplicates always come after the original.
+        content_sources = {}
+        # Content hashes whose original could not be written, to explain their duplicates
+        failed_content = set()
+        
         # Extract files
-        for file_path, file_info in data.get('files', {}).items():
+        for file_path, file_info in file_contents:
             full_path = target_path / file_path
-            
-            # Create parent directories
-            full_path.parent.mkdir(parents=True, exist_ok=True)
+            file_type = file_info.get('type')
             
             # Check if file exists and overwrite setting
             if full_path.exists() and not overwrite:
+                if file_type in ('text', 'binary') and 'sha256' in file_info:
+                    content_sources.setdefault(file_info['sha256'], file_info)
                 results['skipped_files'] += 1
                 continue
             
             try:
-                if file_info.get('type') == 'text':
-                    # Write text file
-                    with open(full_path, 'w', encoding=file_info.get('encoding', 'utf-8')) as f:
-                        f.write(file_info['content'])
+                if file_type in ('text', 'binary'):
+                    self._write_content(full_path, file_info)
+                    if 'sha256' in file_info:
+                        content_sources[file_info['sha256']] = full_path
                 
-                elif file_info.get('type') == 'binary':
-                    # Write binary file
-                    content = base64.b64decode(file_info['content'])
-                    with open(full_path, 'wb') as f:
-                        f.write(content)
+                elif file_type == 'duplicate':
+                    # Copy the already written original instead of decoding the content again
+                    content_ref = file_info.get('content_ref')
+                    source = content_sources.get(content_ref)
+                    if source is None:
+                        reason = "original failed to import" if content_ref in failed_content else "unknown content reference"
+                        results['errors'].append(f"Skipped {file_path}: {reason}")
+                        continue
+                    if isinstance(source, Path):
+                        shutil.copyfile(source, full_path)
+                    else:
+                        self._write_content(full_path, source)
                 
-                elif file_info.get('type') == 'error':
+                elif file_type == 'error':
                     results['errors'].append(f"Skipped {file_path}: {file_info.get('error', 'Unknown error')}")
                     continue
                 
+                elif file_type == 'skipped-large':
+                    size = file_index.get(file_path, {}).get('size')
+                    results['errors'].append(f"Skipped {file_path}: content not exported ({size} bytes)")
+                    continue
+                
                 results['created_files'] += 1
                 
             except Exception as e:
+                if file_type in ('text', 'binary') and 'sha256' in file_info:
+                    failed_content.add(file_info['sha256'])
                 results['errors'].append(f"Error creating {file_path}: {e}")
         
         return results
-
+    
+    def _write_content(self, full_path: Path, file_info: Dict[str, Any]):
+        """Write a text or binary content record to full_path."""
+        content = file_info['content']
+        
+        if file_info['type'] == 'text':
+            # Write text file as pre-encoded bytes, bypassing the text I/O layer
+            full_path.write_bytes(content.encode(file_info.get('encoding', 'utf-8')))
+        elif file_info.get('encoding', 'base64') != 'base64':
+            # Raw bytes from a MessagePack export need no decoding
+            full_path.write_bytes(content)
+        elif len(content) > self.STREAMING_THRESHOLD:
+            self._write_base64_content(full_path, content)
+        else:
+            full_path.write_bytes(base64.b64decode(content))
+    
+    def _write_base64_content(self, full_path: Path, encoded: str):
+        """
+        Decode large base64 content chunk by chunk into full_path.
+        
+        The content is decoded into a temporary file that replaces full_path only once
+        decoding succeeds, so invalid content never leaves a partial file behind.
+        """
+        chunk_size = self.BASE64_DECODE_CHUNK_SIZE
+        temp_path = full_path.with_name(f"{full_path.name}.{os.getpid()}.tmp")
+        try:
+            try:
+                with open(temp_path, 'wb') as f:
+                    if hasattr(os, 'posix_fadvise'):
+                        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    for start in range(0, len(encoded), chunk_size):
+                        f.write(base64.b64decode(encoded[start:start + chunk_size]))
+            except binascii.Error:
+                # Content with embedded whitespace does not split on 4-character boundaries,
+                # so decode it in one piece before rewriting the temporary file
+                temp_path.write_bytes(base64.b64decode(encoded))
+            os.replace(temp_path, full_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
 
 # Initialize the MCP server
 server = Server("project-packager")
@@ -288,6 +844,17 @@ async def list_tools() -> List[types.Tool]:
                         "type": "boolean",
                         "description": "Whether to apply default ignore patterns when no .gitignore exists (default: true)",
                         "default": True
+                    },
+                    "max_file_bytes": {
+                        "type": "integer",
+                        "description": "Files larger than this many bytes are exported as size and SHA-256 only; 0 disables the limit (default: 5 MiB)",
+                        "minimum": 0,
+                        "default": ProjectPackager.DEFAULT_MAX_FILE_BYTES
+                    },
+                    "include_structure": {
+                        "type": "boolean",
+                        "description": "Whether to include a nested directory tree alongside the flat file index (default: false)",
+                        "default": False
                     }
                 },
                 "required": ["project_path"]
@@ -328,20 +895,24 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextCont
             project_path = arguments["project_path"]
             include_hidden = arguments.get("include_hidden", False)
             use_default_ignores = arguments.get("use_default_ignores", True)
+            max_file_bytes = arguments.get("max_file_bytes", ProjectPackager.DEFAULT_MAX_FILE_BYTES)
+            include_structure = arguments.get("include_structure", False)
             
-            result = packager.export_project(project_path, include_hidden, use_default_ignores)
+            result = packager.export_project(project_path, include_hidden, use_default_ignores,
+                                             max_file_bytes=max_file_bytes, include_structure=include_structure)
             
             metadata = result['metadata']
             status_info = f"Successfully exported project from {project_path}\n"
-            status_info += f"Found {len(result['files'])} files\n"
+            status_info += f"Found {len(result['file_index'])} files\n"
             status_info += f"Has .gitignore: {metadata['has_gitignore']}\n"
             status_info += f"Using default ignores: {metadata['use_default_ignores']}\n"
             status_info += f"Including hidden files: {metadata['include_hidden']}\n"
+            status_info += f"Skipped large files: {metadata['skipped_large_files']}\n"
             
             return [
                 types.TextContent(
                     type="text",
-                    text=status_info + f"Project data:\n{json.dumps(result, indent=2)}"
+                    text=status_info + f"Project data:\n{dumps_json(result, indent=True).decode('utf-8')}"
                 )
             ]
             
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the MCP Project Packager CLI wrapper.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# cli.py lives in the project root, next to the tests directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+cli_path = os.path.join(os.path.dirname(current_dir), 'cli.py')
+
+
+def run_cli(*args):
+    """Run cli.py with the given arguments and return the completed process."""
+    return subprocess.run([sys.executable, cli_path, *args], capture_output=True, text=True)
+
+
+@pytest.mark.negative
+@pytest.mark.parametrize("output_name", ["export.json", "export.json.zst"])
+def test_failed_export_keeps_existing_output(tmp_path, output_name):
+    """An export that fails leaves an earlier export at the output path untouched."""
+    output_file = tmp_path / output_name
+    output_file.write_bytes(b"previous export")
+
+    result = run_cli("export", str(tmp_path / "missing"), "-o", str(output_file))
+
+    assert result.returncode == 1
+    assert "Project path does not exist" in result.stderr
+    assert output_file.read_bytes() == b"previous export"
+    assert sorted(path.name for path in tmp_path.iterdir()) == [output_name]
+
+
+@pytest.mark.positive
+def test_export_writes_output_file(tmp_path):
+    """A successful export replaces the output file with the new export."""
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "main.py").write_text("print('hi')")
+    output_file = tmp_path / "export.json"
+    output_file.write_bytes(b"previous export")
+
+    result = run_cli("export", str(project), "-o", str(output_file))
+
+    assert result.returncode == 0
+    assert b'"main.py"' in output_file.read_bytes()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["export.json", "project"]
+
+
+@pytest.mark.positive
+@pytest.mark.parametrize("max_file_bytes, skipped", [("1024", 1), ("0", 0)])
+def test_export_reports_skipped_large_files(tmp_path, max_file_bytes, skipped):
+    """The summary counts files over --max-file-bytes, and 0 exports every file in full."""
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "large.bin").write_bytes(b"x" * 2048)
+    (project / "small.txt").write_text("small")
+    output_file = tmp_path / "export.json"
+
+    result = run_cli("export", str(project), "-o", str(output_file), "--max-file-bytes", max_file_bytes)
+
+    assert result.returncode == 0
+    assert f"- Skipped large files: {skipped}" in result.stdout
+    assert (b'"skipped-large"' in output_file.read_bytes()) == bool(skipped)
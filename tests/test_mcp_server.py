@@ -4,11 +4,14 @@ Test script for the MCP Project Packager server.
 """
 
 import asyncio
+import base64
+import hashlib
 import json
 import tempfile
 import os
 from pathlib import Path
 import sys
+import pytest
 
 # Add src to path for imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -56,8 +59,8 @@ async def test_export_import():
         try:
             exported_data = packager.export_project(str(test_project))
             print(f"Export successful!")
-            print(f"Found {len(exported_data['files'])} files")
-            print("Files:", list(exported_data['files'].keys()))
+            print(f"Found {len(exported_data['file_index'])} files")
+            print("Files:", list(exported_data['file_index'].keys()))
             
             # Save exported data to file for inspection
             export_file = Path(temp_dir) / "exported_project.json"
@@ -81,7 +84,7 @@ async def test_export_import():
             
             # Verify imported files
             print("\n=== Verifying Import ===")
-            for file_path in exported_data['files'].keys():
+            for file_path in exported_data['file_index'].keys():
                 imported_file = import_dir / file_path
                 if imported_file.exists():
                     print(f"✓ {file_path} imported successfully")
@@ -92,5 +95,455 @@ async def test_export_import():
             print(f"Import failed: {e}")
 
 
+@pytest.mark.unit
+def test_export_prunes_ignored_directories(tmp_path):
+    """Default-ignored directories are skipped without descending into them."""
+    (tmp_path / "main.py").write_text("print('main')")
+    (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+    (tmp_path / "node_modules" / "pkg" / "index.js").write_text("module.exports = {}")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("app = None")
+
+    exported_data = ProjectPackager().export_project(str(tmp_path), include_structure=True)
+
+    assert sorted(exported_data['file_index']) == ["main.py", os.path.join("src", "app.py")]
+    src_dir = next(item for item in exported_data['structure'] if item['name'] == "src")
+    assert [child['name'] for child in src_dir['children']] == ["app.py"]
+
+
+def _baseline_ignores(name, patterns):
+    """The original substring and suffix checks for a file in the project root."""
+    for pattern in patterns:
+        if pattern.endswith('/'):
+            continue
+        if pattern.startswith('*'):
+            if name.endswith(pattern[1:]):
+                return True
+        elif pattern in name:
+            return True
+    return False
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("include_hidden", [True, False])
+def test_default_ignores_match_baseline(tmp_path, include_hidden):
+    """Secret and scratch files ignored by the original substring checks stay ignored."""
+    baseline_patterns = ['*.pyc', '*.log', '.env', '.DS_Store', 'Thumbs.db', '*.tmp']
+    names = [".env", ".env.local", ".env.production", ".tmp", "build.tmp",
+             ".log", "debug.log", "main.py", ".editorconfig"]
+    for name in names:
+        (tmp_path / name).write_text("value")
+
+    exported_data = ProjectPackager().export_project(str(tmp_path), include_hidden=include_hidden)
+
+    expected = sorted(
+        name for name in names
+        if (include_hidden or not name.startswith('.')) and not _baseline_ignores(name, baseline_patterns)
+    )
+    assert sorted(exported_data['file_index']) == expected
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("relative_path, ignored", [
+    ("node_modules", True),
+    ("src/__pycache__", True),
+    ("module.pyc", True),
+    ("logs/debug.log", True),
+    (".tmp", True),
+    ("archive.tmp.gz", False),
+    (".env", True),
+    ("config/.env.local", True),
+    (".environment", False),
+    (".DS_Store", True),
+    ("Thumbs.db", True),
+    ("src/main.py", False),
+])
+def test_should_ignore_default_patterns(tmp_path, relative_path, ignored):
+    """Directory names, extensions and literal names from the defaults are ignored."""
+    packager = ProjectPackager()
+
+    assert packager._should_ignore(tmp_path / relative_path) is ignored
+    assert packager._should_ignore(tmp_path / relative_path, use_default_ignores=False) is False
+
+
+@pytest.mark.unit
+def test_should_ignore_check_ancestors(tmp_path):
+    """Ignored parent directories are only checked when the walk has not pruned them."""
+    packager = ProjectPackager()
+    path = tmp_path / "node_modules" / "pkg" / "index.js"
+
+    assert packager._should_ignore(path, check_ancestors=True)
+    assert not packager._should_ignore(path, check_ancestors=False)
+    assert not packager._should_ignore(tmp_path / "src" / "index.js", check_ancestors=True)
+    assert packager._should_ignore(path, lambda p: p.endswith("index.js"), use_default_ignores=False)
+
+
+@pytest.mark.unit
+def test_gitignore_matcher_cache_follows_edits(tmp_path):
+    """An unchanged .gitignore reuses its parsed matcher, and an edited one is parsed again."""
+    import mcp_server
+
+    (tmp_path / "app.py").write_text("app = None")
+    (tmp_path / "notes.txt").write_text("notes")
+    gitignore = tmp_path / ".gitignore"
+    gitignore.write_text("notes*\n")
+    packager = ProjectPackager()
+    mcp_server._load_gitignore.cache_clear()
+
+    assert sorted(packager.export_project(str(tmp_path))['file_index']) == [".gitignore", "app.py"]
+    assert sorted(packager.export_project(str(tmp_path))['file_index']) == [".gitignore", "app.py"]
+    cache_info = mcp_server._load_gitignore.cache_info()
+    assert (cache_info.hits, cache_info.misses) == (1, 1)
+
+    # Same size as before, so only the modification time tells the versions apart
+    gitignore.write_text("app.py\n")
+    stat_result = gitignore.stat()
+    os.utime(gitignore, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1_000_000_000))
+
+    assert sorted(packager.export_project(str(tmp_path))['file_index']) == [".gitignore", "notes.txt"]
+    assert mcp_server._load_gitignore.cache_info().misses == 2
+
+
+@pytest.mark.unit
+def test_read_file_content_large_files_are_chunked(tmp_path):
+    """Files over the streaming threshold round-trip through the chunked reader."""
+    packager = ProjectPackager()
+    packager.STREAMING_THRESHOLD = 64
+    binary_data = bytes(range(256)) * 4
+    (tmp_path / "data.bin").write_bytes(binary_data)
+    (tmp_path / "notes.txt").write_text("caf\u00e9\n" * 100, encoding="utf-8")
+
+    binary_info = packager._read_file_content(tmp_path / "data.bin")
+    text_info = packager._read_file_content(tmp_path / "notes.txt")
+
+    assert binary_info['type'] == "binary"
+    assert base64.b64decode(binary_info['content']) == binary_data
+    assert text_info['type'] == "text"
+    assert text_info['content'] == "caf\u00e9\n" * 100
+
+
+@pytest.mark.integration
+def test_msgpack_export_import_roundtrip(tmp_path):
+    """MessagePack exports keep binary files as raw bytes and import back unchanged."""
+    pytest.importorskip("msgpack")
+    from mcp_server import dumps_msgpack
+
+    project = tmp_path / "project"
+    project.mkdir()
+    binary_data = bytes(range(256))
+    (project / "image.bin").write_bytes(binary_data)
+    (project / "README.md").write_text("# Project")
+
+    packager = ProjectPackager()
+    exported_data = packager.export_project(str(project), export_format="msgpack")
+    assert exported_data['file_contents']["image.bin"]['content'] == binary_data
+
+    result = packager.import_project(dumps_msgpack(exported_data), str(tmp_path / "imported"))
+
+    assert result['created_files'] == 2
+    assert (tmp_path / "imported" / "image.bin").read_bytes() == binary_data
+    assert (tmp_path / "imported" / "README.md").read_text() == "# Project"
+
+
+@pytest.mark.edge
+def test_export_skips_files_over_size_limit(tmp_path):
+    """Files above max_file_bytes are exported as size and hash only."""
+    large_data = b"x" * 2048
+    (tmp_path / "large.bin").write_bytes(large_data)
+    (tmp_path / "small.txt").write_text("small")
+
+    exported_data = ProjectPackager().export_project(str(tmp_path), max_file_bytes=1024)
+
+    large_info = exported_data['file_contents']["large.bin"]
+    assert large_info['type'] == "skipped-large"
+    assert large_info['sha256'] == hashlib.sha256(large_data).hexdigest()
+    assert 'content' not in large_info
+    assert exported_data['file_index']["large.bin"]['size'] == 2048
+    assert exported_data['file_contents']["small.txt"]['content'] == "small"
+    assert exported_data['metadata']['skipped_large_files'] == 1
+
+
+@pytest.mark.edge
+def test_export_size_limit_zero_is_unlimited(tmp_path):
+    """A max_file_bytes of 0 exports every file in full, through the MCP tool as well."""
+    import mcp_server
+
+    (tmp_path / "large.bin").write_bytes(b"x" * 2048)
+
+    exported_data = ProjectPackager().export_project(str(tmp_path), max_file_bytes=0)
+
+    assert exported_data['file_contents']["large.bin"]['content'] == "x" * 2048
+    assert exported_data['metadata']['max_file_bytes'] is None
+    assert exported_data['metadata']['skipped_large_files'] == 0
+
+    for max_file_bytes, skipped in [(1024, 1), (0, 0)]:
+        response = asyncio.run(mcp_server.call_tool("export_project", {
+            'project_path': str(tmp_path),
+            'max_file_bytes': max_file_bytes
+        }))
+        assert f"Skipped large files: {skipped}\n" in response[0].text
+
+    with pytest.raises(ValueError):
+        ProjectPackager().export_project(str(tmp_path), max_file_bytes=-1)
+
+
+@pytest.mark.integration
+def test_import_project_file_roundtrip(tmp_path):
+    """Exported files import back with the same contents, streamed when ijson is available."""
+    project = tmp_path / "project"
+    (project / "pkg").mkdir(parents=True)
+    (project / "pkg" / "module.py").write_text("VALUE = 1")
+    (project / "logo.bin").write_bytes(b"\x89PNG\x00\xff")
+
+    packager = ProjectPackager()
+    export_file = tmp_path / "export.json"
+    export_file.write_text(json.dumps(packager.export_project(str(project))))
+
+    result = packager.import_project_file(str(export_file), str(tmp_path / "imported"))
+
+    assert result['created_files'] == 2
+    assert (tmp_path / "imported" / "pkg" / "module.py").read_text() == "VALUE = 1"
+    assert (tmp_path / "imported" / "logo.bin").read_bytes() == b"\x89PNG\x00\xff"
+
+
+@pytest.mark.unit
+def test_write_export_streams_valid_json(tmp_path):
+    """The streamed export parses to the same data as export_project."""
+    import io
+
+    (tmp_path / "a.txt").write_text("alpha")
+    (tmp_path / "b.txt").write_text("beta")
+    packager = ProjectPackager()
+    output = io.BytesIO()
+
+    header = packager.write_export(output, str(tmp_path))
+    streamed = json.loads(output.getvalue())
+
+    assert 'file_contents' not in header
+    assert list(streamed) == ['metadata', 'file_index', 'file_contents']
+    assert streamed['file_index'] == header['file_index']
+    assert streamed['file_contents']["a.txt"]['content'] == "alpha"
+    assert streamed['file_contents']["b.txt"]['content'] == "beta"
+
+
+@pytest.mark.edge
+def test_write_export_non_utf8_file_name(tmp_path):
+    """File names that are not valid UTF-8 do not fail the export."""
+    import io
+
+    bad_name = os.fsdecode(b"bad\xff.txt")
+    try:
+        (tmp_path / bad_name).write_text("content")
+    except (OSError, UnicodeEncodeError):
+        pytest.skip("File system does not accept non-UTF-8 file names")
+    output = io.BytesIO()
+
+    ProjectPackager().write_export(output, str(tmp_path))
+    streamed = json.loads(output.getvalue())
+
+    assert list(streamed['file_index']) == [bad_name]
+    assert streamed['file_contents'][bad_name]['content'] == "content"
+
+
+@pytest.mark.unit
+def test_dumps_json_without_orjson(monkeypatch):
+    """The standard library fallback produces the same JSON as orjson."""
+    import mcp_server
+
+    data = {'name': "café", 'size': 3, 'items': [1.5, None, True]}
+    monkeypatch.setattr(mcp_server, "orjson", None)
+
+    assert json.loads(mcp_server.dumps_json(data)) == data
+    assert mcp_server.dumps_json(data, indent=True).decode('utf-8') == json.dumps(data, indent=2)
+    assert mcp_server.loads_json(b'{"a": [1, 2]}') == {'a': [1, 2]}
+
+
+@pytest.mark.edge
+def test_export_classifies_special_entries(tmp_path):
+    """Regular files and symlinks to them are exported; other entries are left out."""
+    project = tmp_path / "project"
+    (project / "pkg").mkdir(parents=True)
+    (project / "pkg" / "module.py").write_text("VALUE = 1")
+    (project / "main.py").write_text("print('main')")
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "secret.txt").write_text("outside")
+    try:
+        (project / "link.py").symlink_to(project / "main.py")
+        (project / "broken.py").symlink_to(project / "missing.py")
+        (project / "linked_dir").symlink_to(outside, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        pytest.skip("Symlinks are not supported here")
+    if hasattr(os, "mkfifo"):
+        os.mkfifo(project / "pipe")
+
+    exported_data = ProjectPackager().export_project(str(project))
+
+    file_index = exported_data['file_index']
+    assert sorted(file_index) == ["link.py", "main.py", os.path.join("pkg", "module.py")]
+    assert file_index["link.py"]['size'] == len("print('main')")
+    # The link and its target share content, so whichever is read second is a duplicate
+    contents = exported_data['file_contents']
+    assert sorted([contents["link.py"]['type'], contents["main.py"]['type']]) == ["duplicate", "text"]
+
+
+@pytest.mark.edge
+def test_export_deep_tree_does_not_recurse(tmp_path):
+    """Directory depth does not consume Python stack frames during the walk."""
+    depth = 60
+    current = tmp_path
+    for _ in range(depth):
+        current = current / "d"
+    current.mkdir(parents=True)
+    (current / "leaf.txt").write_text("leaf")
+
+    frame, frames_in_use = sys._getframe(), 0
+    while frame is not None:
+        frame, frames_in_use = frame.f_back, frames_in_use + 1
+
+    original_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(frames_in_use + 40)
+    try:
+        exported_data = ProjectPackager().export_project(str(tmp_path))
+    finally:
+        sys.setrecursionlimit(original_limit)
+
+    assert list(exported_data['file_index']) == [os.path.join(*(["d"] * depth), "leaf.txt")]
+
+
+@pytest.mark.integration
+def test_duplicate_contents_are_stored_once(tmp_path):
+    """Identical files are exported once and restored from the first copy on import."""
+    project = tmp_path / "project"
+    (project / "a").mkdir(parents=True)
+    (project / "b").mkdir()
+    (project / "a" / "LICENSE").write_text("MIT License")
+    (project / "b" / "LICENSE").write_text("MIT License")
+
+    packager = ProjectPackager()
+    exported_data = packager.export_project(str(project))
+
+    records = list(exported_data['file_contents'].values())
+    digest = hashlib.sha256(b"MIT License").hexdigest()
+    assert sorted(record['type'] for record in records) == ["duplicate", "text"]
+    assert all(record.get('sha256', record.get('content_ref')) == digest for record in records)
+
+    result = packager.import_project(exported_data, str(tmp_path / "imported"))
+
+    assert result['created_files'] == 2
+    assert (tmp_path / "imported" / "a" / "LICENSE").read_text() == "MIT License"
+    assert (tmp_path / "imported" / "b" / "LICENSE").read_text() == "MIT License"
+
+
+@pytest.mark.negative
+def test_duplicate_of_failed_original_reports_cause(tmp_path):
+    """Duplicates of an original that could not be written name that as the cause."""
+    digest = hashlib.sha256(b"MIT License").hexdigest()
+    target = tmp_path / "imported"
+    # A directory where the original belongs makes writing it fail
+    (target / "LICENSE").mkdir(parents=True)
+
+    result = ProjectPackager().import_project({
+        'file_index': {"LICENSE": {'size': 11}, "COPYING": {'size': 11}},
+        'file_contents': {
+            "LICENSE": {'type': 'text', 'content': "MIT License", 'encoding': 'utf-8', 'sha256': digest},
+            "COPYING": {'type': 'duplicate', 'content_ref': digest}
+        }
+    }, str(target), overwrite=True)
+
+    assert result['created_files'] == 0
+    assert result['errors'][0].startswith("Error creating LICENSE")
+    assert result['errors'][1] == "Skipped COPYING: original failed to import"
+
+
+@pytest.mark.integration
+def test_import_project_file_decompresses_zstd(tmp_path):
+    """Zstandard compressed exports are detected and imported transparently."""
+    pytest.importorskip("zstandard")
+    from mcp_server import open_zstd_writer
+
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "main.py").write_text("print('compressed')")
+
+    packager = ProjectPackager()
+    export_file = tmp_path / "export.json.zst"
+    with open(export_file, 'wb') as f, open_zstd_writer(f) as compressed:
+        packager.write_export(compressed, str(project))
+
+    result = packager.import_project_file(str(export_file), str(tmp_path / "imported"))
+
+    assert result['created_files'] == 1
+    assert (tmp_path / "imported" / "main.py").read_text() == "print('compressed')"
+
+
+@pytest.mark.unit
+def test_write_content_large_base64_is_chunked(tmp_path):
+    """Large base64 content is decoded in chunks, with a fallback for embedded newlines."""
+    packager = ProjectPackager()
+    packager.STREAMING_THRESHOLD = 64
+    packager.BASE64_DECODE_CHUNK_SIZE = 16
+    binary_data = bytes(range(256)) * 4
+
+    for name, encoded in [("plain.bin", base64.b64encode(binary_data)),
+                          ("wrapped.bin", base64.encodebytes(binary_data))]:
+        packager._write_content(tmp_path / name, {
+            'type': 'binary',
+            'content': encoded.decode('ascii'),
+            'encoding': 'base64'
+        })
+        assert (tmp_path / name).read_bytes() == binary_data
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["plain.bin", "wrapped.bin"]
+
+
+@pytest.mark.negative
+def test_import_invalid_large_base64_leaves_no_file(tmp_path):
+    """Invalid large base64 content is reported without leaving a partial file."""
+    packager = ProjectPackager()
+    packager.STREAMING_THRESHOLD = 64
+    packager.BASE64_DECODE_CHUNK_SIZE = 16
+    invalid_content = base64.b64encode(b"x" * 300).decode('ascii') + "A"
+
+    result = packager.import_project({
+        'file_index': {"broken.bin": {'name': "broken.bin", 'path': "broken.bin"}},
+        'file_contents': {"broken.bin": {'type': 'binary', 'content': invalid_content, 'encoding': 'base64'}}
+    }, str(tmp_path))
+
+    assert result['created_files'] == 0
+    assert len(result['errors']) == 1
+    assert result['errors'][0].startswith("Error creating broken.bin")
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.unit
+def test_fallback_gitignore_parser(tmp_path, monkeypatch):
+    """The pathspec fallback used without gitignore_parser follows gitignore semantics."""
+    import importlib.util
+
+    # A None entry in sys.modules makes "import gitignore_parser" raise ImportError
+    monkeypatch.setitem(sys.modules, "gitignore_parser", None)
+    spec = importlib.util.spec_from_file_location("mcp_server_fallback", os.path.join(src_dir, "mcp_server.py"))
+    fallback_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(fallback_module)
+
+    (tmp_path / ".gitignore").write_text("*.log\n!keep.log\ndocs/**/*.tmp\n/top.txt\nbuild/\n..cache\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "docs" / "deep").mkdir(parents=True)
+    matches = fallback_module.parse_gitignore(str(tmp_path / ".gitignore"))
+
+    assert matches(str(tmp_path / "debug.log"))
+    assert not matches(str(tmp_path / "keep.log"))
+    assert matches(str(tmp_path / "docs" / "deep" / "draft.tmp"))
+    assert not matches(str(tmp_path / "draft.tmp"))
+    assert matches(str(tmp_path / "top.txt"))
+    assert not matches(str(tmp_path / "sub" / "top.txt"))
+    assert matches(str(tmp_path / "build"))
+    assert matches(str(tmp_path / "build" / "out.o"))
+    assert not matches(str(tmp_path / "build.py"))
+    assert matches(str(tmp_path / "..cache"))
+    assert not matches(str(tmp_path.parent / "debug.log"))
+
+
 if __name__ == "__main__":
     asyncio.run(test_export_import())
\ No newline at end of file